@@ -1,5 +1,5 @@
 from pyptz.onvif_control import ONVIFCamera
-from pyptz.vapix_control import VAPIXCamera
+from pyptz.vapix_control import VAPIXAuthError, VAPIXCamera
 from pyptz.sunapi_control import SUNAPICamera
 
 __version__ = "0.1.8"
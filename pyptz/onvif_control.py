@@ -1,4 +1,48 @@
+from functools import lru_cache
+
 import onvif
+import requests
+import zeep
+from onvif.client import UsernameDigestTokenDtDiff
+from zeep.transports import Transport
+from zeep.wsdl import Document
+
+from pyptz.utils import Debouncer, KeepAliveAdapter
+
+# the settings onvif-zeep builds its clients with
+_SETTINGS = zeep.Settings(strict=False, xml_huge_tree=True)
+
+
+@lru_cache(maxsize=None)
+def _wsdl_document(path: str):
+    """
+    Returns the parsed WSDL document of path, shared by every ONVIFCamera of the process.
+    The onvif-zeep WSDLs and the schemas they import are local files, which zeep neither caches nor shares.
+    """
+    return Document(path, Transport(), settings=_SETTINGS)
+
+
+class _ONVIFClient(onvif.ONVIFCamera):
+    """
+    onvif.ONVIFCamera building its services on the shared parsed WSDL documents instead of parsing them again
+    """
+
+    def create_onvif_service(self, name, from_template=True, portType=None):
+        name = name.lower()
+        xaddr, wsdl_file, binding_name = self.get_definition(name, portType)
+
+        # the parsed document is shared, the credentials and the transport stay per camera
+        wsse = UsernameDigestTokenDtDiff(self.user, self.passwd, dt_diff=self.dt_diff, use_digest=self.encrypt)
+        client = zeep.Client(wsdl=_wsdl_document(wsdl_file), wsse=wsse, transport=self.transport,
+                             settings=_SETTINGS)
+
+        with self.services_lock:
+            service = onvif.ONVIFService(xaddr, self.user, self.passwd, wsdl_file, self.encrypt, self.daemon,
+                                         zeep_client=client, portType=portType, dt_diff=self.dt_diff,
+                                         binding_name=binding_name, transport=self.transport)
+            self.services[name] = service
+            setattr(self, name, service)
+        return service
 
 
 class ONVIFCamera:
@@ -6,8 +50,14 @@ class ONVIFCamera:
     Module for controlling cameras using ONVIF
     """
 
-    def __init__(self, ip, port, username, password):
-        camera = onvif.ONVIFCamera(ip, port, username, password)
+    def __init__(self, ip, port, username, password, timeout=5, move_interval=None):
+        # All services share one transport, so every SOAP call goes over the same kept-alive session.
+        # Authentication is done with WS-Security inside the envelope, the session needs no HTTP auth.
+        self.__session = requests.Session()
+        self.__session.mount('http://', KeepAliveAdapter())
+        self.__session.mount('https://', KeepAliveAdapter())
+        transport = Transport(session=self.__session, timeout=timeout, operation_timeout=timeout)
+        camera = _ONVIFClient(ip, port, username, password, transport=transport)
 
         ptz = camera.create_ptz_service()
         media = camera.create_media_service()
@@ -15,6 +65,37 @@ class ONVIFCamera:
         self.__ptz = ptz
         self.__token = media.GetProfiles()[0]
 
+        # create_type walks the zeep schema on every call, so each request is built once
+        # and only its variable fields are filled in before it is sent
+        self.__requests = {}
+        for name in ('AbsoluteMove', 'ContinuousMove', 'RelativeMove', 'Stop', 'GetStatus',
+                     'GetPresets', 'SetPreset', 'RemovePreset', 'GotoPreset',
+                     'SetHomePosition', 'GotoHomePosition'):
+            request = ptz.create_type(name)
+            request.ProfileToken = self.__token
+            self.__requests[name] = request
+
+        self.__presets = None
+        self.__preset_by_name = {}
+
+        # With a move_interval, continuous_move and stop_move are sent from a background thread at most once per
+        # interval, and a command still waiting is replaced by the next one instead of piling up
+        self.__mover = None if move_interval is None else Debouncer(move_interval)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Closes the connections kept open to the camera.
+        """
+        if self.__mover is not None:
+            self.__mover.close()
+        self.__session.close()
+
     def absolute_move(self, pan: float, tilt: float, zoom: float):
         """
         Operation to move pan, tilt or zoom to an absolute destination.
@@ -27,8 +108,7 @@ class ONVIFCamera:
         Returns:
             Return onvif's response
         """
-        request = self.__ptz.create_type('AbsoluteMove')
-        request.ProfileToken = self.__token
+        request = self.__requests['AbsoluteMove']
         request.Position = {'PanTilt': {'x': pan, 'y': tilt}, 'Zoom': zoom}
         response = self.__ptz.AbsoluteMove(request)
         return response
@@ -43,10 +123,15 @@ class ONVIFCamera:
             zoom: speed of movement of Zoom.
 
         Returns:
-            Return onvif's response.
+            Return onvif's response, or None when sent with move_interval.
         """
-        request = self.__ptz.create_type('ContinuousMove')
-        request.ProfileToken = self.__token
+        if self.__mover is not None:
+            self.__mover.submit(self.__continuous_move, pan, tilt, zoom)
+            return None
+        return self.__continuous_move(pan, tilt, zoom)
+
+    def __continuous_move(self, pan: float, tilt: float, zoom: float):
+        request = self.__requests['ContinuousMove']
         request.Velocity = {'PanTilt': {'x': pan, 'y': tilt}, 'Zoom': zoom}
         response = self.__ptz.ContinuousMove(request)
         return response
@@ -63,8 +148,7 @@ class ONVIFCamera:
         Returns:
             Return onvif's response
         """
-        request = self.__ptz.create_type('RelativeMove')
-        request.ProfileToken = self.__token
+        request = self.__requests['RelativeMove']
         request.Translation = {'PanTilt': {'x': pan, 'y': tilt}, 'Zoom': zoom}
         response = self.__ptz.RelativeMove(request)
         return response
@@ -74,10 +158,12 @@ class ONVIFCamera:
         Operation to stop ongoing pan, tilt and zoom movements of absolute relative and continuous type.
 
         Returns:
-            Return onvif's response
+            Return onvif's response, or None when sent with move_interval.
         """
-        request = self.__ptz.create_type('Stop')
-        request.ProfileToken = self.__token
+        request = self.__requests['Stop']
+        if self.__mover is not None:
+            self.__mover.submit(self.__ptz.Stop, request)
+            return None
         response = self.__ptz.Stop(request)
         return response
 
@@ -88,10 +174,9 @@ class ONVIFCamera:
         Returns:
             Return onvif's response
         """
-        request = self.__ptz.create_type('SetHomePosition')
-        request.ProfileToken = self.__token
+        request = self.__requests['SetHomePosition']
         response = self.__ptz.SetHomePosition(request)
-        self.__ptz.Stop({'ProfileToken': self.__token})
+        self.__ptz.Stop(self.__requests['Stop'])
         return response
 
     def go_home_position(self):
@@ -101,8 +186,7 @@ class ONVIFCamera:
         Returns:
             Return onvif's response
         """
-        request = self.__ptz.create_type('GotoHomePosition')
-        request.ProfileToken = self.__token
+        request = self.__requests['GotoHomePosition']
         response = self.__ptz.GotoHomePosition(request)
         return response
 
@@ -113,8 +197,7 @@ class ONVIFCamera:
         Returns:
             Returns a list with the values of Pan, Tilt and Zoom
         """
-        request = self.__ptz.create_type('GetStatus')
-        request.ProfileToken = self.__token
+        request = self.__requests['GetStatus']
         ptz_status = self.__ptz.GetStatus(request)
         pan = ptz_status.Position.PanTilt.x
         tilt = ptz_status.Position.PanTilt.y
@@ -130,16 +213,13 @@ class ONVIFCamera:
         Returns:
             Return onvif's response.
         """
-        presets = ONVIFCamera.get_preset_complete(self)
-        request = self.__ptz.create_type('SetPreset')
-        request.ProfileToken = self.__token
-        request.PresetName = preset_name
-
-        for i, preset in enumerate(presets):
-            if str(presets[i].Name) == preset_name:
-                return None
+        if self.__find_preset(preset_name) is not None:
+            return None
 
+        request = self.__requests['SetPreset']
+        request.PresetName = preset_name
         ptz_set_preset = self.__ptz.SetPreset(request)
+        self.__presets = None
         return ptz_set_preset
 
     def get_preset(self):
@@ -149,12 +229,7 @@ class ONVIFCamera:
         Returns:
             Returns a list of tuples with the presets.
         """
-        ptz_get_presets = ONVIFCamera.get_preset_complete(self)
-
-        presets = []
-        for i, _ in enumerate(ptz_get_presets):
-            presets.append((i, ptz_get_presets[i].Name))
-        return presets
+        return [(i, preset.Name) for i, preset in enumerate(self.get_preset_complete())]
 
     def get_preset_complete(self):
         """
@@ -163,10 +238,24 @@ class ONVIFCamera:
         Returns:
             Returns the complete presets Onvif.
         """
-        request = self.__ptz.create_type('GetPresets')
-        request.ProfileToken = self.__token
-        ptz_get_presets = self.__ptz.GetPresets(request)
-        return ptz_get_presets
+        # presets only change through set_preset and remove_preset, which drop this cache
+        if self.__presets is None:
+            self.__presets = self.__ptz.GetPresets(self.__requests['GetPresets'])
+            self.__preset_by_name = {str(preset.Name): preset for preset in self.__presets}
+        return self.__presets
+
+    def __find_preset(self, preset_name: str):
+        """
+        Looks up a preset by its name.
+
+        Args:
+            preset_name: Preset name.
+
+        Returns:
+            Returns the onvif preset or None when no preset has this name.
+        """
+        self.get_preset_complete()
+        return self.__preset_by_name.get(preset_name)
 
     def remove_preset(self, preset_name: str):
         """
@@ -178,15 +267,15 @@ class ONVIFCamera:
         Returns:
             Return onvif's response.
         """
-        presets = ONVIFCamera.get_preset_complete(self)
-        request = self.__ptz.create_type('RemovePreset')
-        request.ProfileToken = self.__token
-        for i, _ in enumerate(presets):
-            if str(presets[i].Name) == preset_name:
-                request.PresetToken = presets[i].token
-                ptz_remove_preset = self.__ptz.RemovePreset(request)
-                return ptz_remove_preset
-        return None
+        preset = self.__find_preset(preset_name)
+        if preset is None:
+            return None
+
+        request = self.__requests['RemovePreset']
+        request.PresetToken = preset.token
+        ptz_remove_preset = self.__ptz.RemovePreset(request)
+        self.__presets = None
+        return ptz_remove_preset
 
     def go_to_preset(self, preset_position: str):
         """
@@ -198,13 +287,11 @@ class ONVIFCamera:
         Returns:
             Return onvif's response.
         """
-        presets = ONVIFCamera.get_preset_complete(self)
-        request = self.__ptz.create_type('GotoPreset')
-        request.ProfileToken = self.__token
-        for i, _ in enumerate(presets):
-            str1 = str(presets[i].Name)
-            if str1 == preset_position:
-                request.PresetToken = presets[i].token
-                response = self.__ptz.GotoPreset(request)
-                return response
-        return None
+        preset = self.__find_preset(preset_position)
+        if preset is None:
+            return None
+
+        request = self.__requests['GotoPreset']
+        request.PresetToken = preset.token
+        response = self.__ptz.GotoPreset(request)
+        return response
@@ -1,5 +1,90 @@
-from bs4 import BeautifulSoup
-from requests import auth, get
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from importlib.util import find_spec
+from io import BytesIO
+from urllib.parse import urlencode
+
+import requests
+from requests import auth
+from urllib3.util.retry import Retry
+
+from pyptz.utils import Debouncer, KeepAliveAdapter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    from turbojpeg import TJPF_BGR, TJPF_RGB, TurboJPEG
+except ImportError:
+    TurboJPEG = None
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def _jpeg_decoder():
+    """
+    Returns the shared libjpeg-turbo decoder, or None when PyTurboJPEG or its library is not installed
+    """
+    if TurboJPEG is None:
+        return None
+    try:
+        return TurboJPEG()
+    except (OSError, RuntimeError):
+        return None
+
+
+@lru_cache(maxsize=None)
+def _opencv():
+    """
+    Returns the (cv2, numpy) modules, or None when OpenCV is not installed
+    """
+    try:
+        import cv2
+        import numpy
+    except ImportError:
+        return None
+    return cv2, numpy
+
+
+def _query(prefix: str = '', **params) -> str:
+    """
+    Appends the params that are not None to an already url-encoded query string
+    """
+    params = urlencode([(key, value) for key, value in params.items() if value is not None])
+    if prefix and params:
+        return prefix + '&' + params
+    return prefix or params
+
+
+# Constant part of the query string of every command, encoded once at import
+_PTZ_QUERY = urlencode({'msubmenu': 'query', 'action': 'view', 'Query': 'Pan,Tilt,Zoom'})
+_PTZ_STOP = urlencode({'msubmenu': 'stop', 'action': 'control', 'OperationType': 'All'})
+_PTZ_ABSOLUTE = urlencode({'msubmenu': 'absolute', 'action': 'control'})
+_PTZ_RELATIVE = urlencode({'msubmenu': 'relative', 'action': 'control'})
+_PTZ_CONTINUOUS = urlencode({'msubmenu': 'continuous', 'action': 'control'})
+_PTZ_AREA_ZOOM = urlencode({'msubmenu': 'areazoom', 'action': 'control'})
+_PTZ_ZOOM_OUT = urlencode({'msubmenu': 'areazoom', 'action': 'control', 'Type': '1x'})
+_PTZ_MOVE = urlencode({'msubmenu': 'move', 'action': 'control'})
+_PTZ_HOME = urlencode({'msubmenu': 'home', 'action': 'control'})
+_PTZ_PRESET = urlencode({'msubmenu': 'preset', 'action': 'control'})
+_PTZ_AUX = urlencode({'msubmenu': 'aux', 'action': 'control'})
+_PTZ_SWING = urlencode({'msubmenu': 'swing', 'action': 'control'})
+_PTZ_GROUP = urlencode({'msubmenu': 'group', 'action': 'control'})
+_PTZ_TOUR = urlencode({'msubmenu': 'tour', 'action': 'control'})
+_PTZ_TRACE = urlencode({'msubmenu': 'trace', 'action': 'control'})
+_APPS = urlencode({'msubmenu': 'apps', 'action': 'view'})
+_SNAPSHOT = urlencode({'msubmenu': 'snapshot', 'action': 'view'})
 
 
 class SUNAPICamera:
@@ -7,33 +92,180 @@ class SUNAPICamera:
     Module for the control of HANWHA cameras using SUNAPI
     """
 
-    def __init__(self, ip, user, password):
+    def __init__(self, ip, user, password, timeout=(2.0, 5.0), status_ttl=0, move_interval=None,
+                 zero_pan_relative=False):
         self.__username = user
         self.__password = password
         self.__url = 'http://' + ip + '/stw-cgi/'
+        self.__timeout = timeout
+
+        # last known (pan, tilt, zoom), reused by relative_move for status_ttl seconds. Off by default, and dropped
+        # by every other command moving the head since the camera is then no longer where it was last sent to.
+        self.__status_ttl = status_ttl
+        self.__status = None
+        self.__status_time = 0.0
+
+        # Some models ignore relative pan moves at pan 0, relative_move falls back to absolute ones there
+        # unless the camera is known to support them
+        self.__zero_pan_relative = zero_pan_relative
+
+        # One session and one digest auth object for the lifetime of the camera: the TCP connection is kept
+        # alive and the cached nonce lets every command after the first skip the 401 challenge round-trip.
+        # Only connection errors are retried, a PTZ command that reached the camera is never sent twice.
+        adapter = KeepAliveAdapter(pool_connections=4, pool_maxsize=8,
+                                   max_retries=Retry(total=3, read=0, backoff_factor=0.2))
+        self.__session = requests.Session()
+        self.__session.mount('http://', adapter)
+        self.__auth = auth.HTTPDigestAuth(user, password)
+        self.__async_session = None
+        self.__async_loop = None
+
+        # With a move_interval, continuous_move and stop are sent from a background thread at most once per
+        # interval, and a command still waiting is replaced by the next one instead of piling up
+        self.__mover = None if move_interval is None else Debouncer(move_interval)
+
+        # Sends the commands not waited for, a single worker keeps them in the order they were issued
+        self.__pool = ThreadPoolExecutor(max_workers=1)
 
-    def __cmd(self, cgi: str, payload: dict):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Closes the connections kept open to the camera.
+        """
+        if self.__mover is not None:
+            self.__mover.close()
+        self.__pool.shutdown()
+        self.__session.close()
+
+    async def aclose(self):
+        """
+        Closes the connections opened by the asynchronous commands, from the event loop that sent them.
+        """
+        if self.__async_session is not None:
+            await self.__async_session.aclose()
+            self.__async_session = None
+            self.__async_loop = None
+
+    @staticmethod
+    def __check(response):
+        """
+        Reports the error returned by the camera, if any.
+        Args:
+            response: response of either the requests or the httpx client
+
+        Raises:
+            PermissionError: the camera rejected the credentials.
+        """
+        if response.status_code not in (200, 204):
+            # SUNAPI reports errors as plain text, there is no markup to strip
+            if logger.isEnabledFor(logging.WARNING):
+                logger.warning('SUNAPI %s -> %d: %s', response.url, response.status_code, response.text[:256])
+            if response.status_code == 401:
+                raise PermissionError('SUNAPI camera rejected the credentials')
+
+    def __cmd(self, cgi: str, payload, wait: bool = True):
         """
         Function used to send commands to the camera
         Args:
-            payload: argument dictionary for camera control
+            payload: argument dictionary or url-encoded query string for camera control
+            wait: when False, the command is sent from a worker thread and a Future is returned at once
 
         Returns:
-            Returns the response from the device to the command sent
+            Returns the response from the device to the command sent, or its Future
         """
+        if not wait:
+            return self.__pool.submit(self.__cmd, cgi, payload)
 
-        response = get(self.__url + cgi,
-                       auth=auth.HTTPDigestAuth(self.__username, self.__password),
-                       params=payload)
+        response = self.__session.get(self.__url + cgi,
+                                      auth=self.__auth,
+                                      params=payload,
+                                      timeout=self.__timeout)
+        self.__check(response)
+        return response
 
-        if (response.status_code != 200) and (response.status_code != 204):
-            soup = BeautifulSoup(response.text, features="lxml")
-            print('%s', soup.get_text())
-            if response.status_code == 401:
-                exit(1)
+    async def __acmd(self, cgi: str, payload):
+        """
+        Asynchronous counterpart of __cmd, sent with httpx over HTTP/2 when the camera and h2 support it.
+        The client's connections belong to the event loop that opened them, so it is re-created
+        when called from another loop, e.g. on a second asyncio.run.
+        Args:
+            payload: argument dictionary or url-encoded query string for camera control
 
+        Returns:
+            Returns the httpx response from the device to the command sent
+        """
+        loop = asyncio.get_running_loop()
+        if self.__async_session is None or self.__async_loop is not loop:
+            if httpx is None:
+                raise RuntimeError("Asynchronous commands require httpx: pip install pyptz[async]")
+
+            timeout = self.__timeout
+            if isinstance(timeout, tuple):
+                timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+            self.__async_session = httpx.AsyncClient(base_url=self.__url,
+                                                     auth=httpx.DigestAuth(self.__username, self.__password),
+                                                     http2=find_spec('h2') is not None,
+                                                     limits=httpx.Limits(max_keepalive_connections=8,
+                                                                         max_connections=16),
+                                                     timeout=timeout)
+            self.__async_loop = loop
+
+        if isinstance(payload, dict):
+            # httpx sends None values as empty parameters where requests leaves them out
+            payload = _query(**payload)
+        response = await self.__async_session.get(cgi, params=payload)
+        self.__check(response)
         return response
 
+    async def batch(self, ops: list):
+        """
+        Sends independent commands concurrently over the asynchronous client.
+
+        Args:
+            ops: list of (cgi, payload) tuples, e.g. [('ptzcontrol.cgi', {'msubmenu': 'stop', 'action': 'control'})]
+
+        Returns:
+            Returns the list of httpx responses, in the order of ops
+        """
+        return await asyncio.gather(*[self.__acmd(cgi, payload) for cgi, payload in ops])
+
+    @classmethod
+    async def batch_across(cls, cameras: list, ops: list):
+        """
+        Sends the same independent commands to several cameras concurrently.
+
+        Args:
+            cameras: list of SUNAPICamera
+            ops: list of (cgi, payload) tuples
+
+        Returns:
+            Returns one list of httpx responses per camera, in the order of cameras
+        """
+        return await asyncio.gather(*[camera.batch(ops) for camera in cameras])
+
+    def __set_position(self, pan, tilt, zoom):
+        """
+        Remembers the position the camera is at or was last sent to.
+        """
+        if pan is None or tilt is None or zoom is None:
+            self.__status = None
+        else:
+            self.__status = (pan, tilt, zoom)
+            self.__status_time = time.monotonic()
+
+    def __get_position(self):
+        """
+        Returns the last known (pan, tilt, zoom), querying the camera only when it is older than status_ttl.
+        """
+        if self.__status is None or time.monotonic() - self.__status_time > self.__status_ttl:
+            return self.get_ptz_status()[:3]
+        return self.__status
+
     def get_ptz_status(self):
         """
         Operation to request PTZ status.
@@ -41,13 +273,14 @@ class SUNAPICamera:
         Returns:
             Returns status and notifies when the operation is finished
         """
-        response = self.__cmd(cgi='ptzcontrol.cgi',
-                              payload={'msubmenu': 'query', 'action': 'view', 'Query': 'Pan,Tilt,Zoom'})
+        response = self.__cmd(cgi='ptzcontrol.cgi', payload=_PTZ_QUERY)
+
+        status = dict(line.split('=', 1) for line in response.text.split())
 
-        current_pan = float(response.text.split()[0].split('=')[1])
-        current_tilt = float(response.text.split()[1].split('=')[1])
-        current_zoom = float(response.text.split()[2].split('=')[1])
-        current_zoom_pulse = float(response.text.split()[3].split('=')[1])
+        current_pan = float(status['Pan'])
+        current_tilt = float(status['Tilt'])
+        current_zoom = float(status['Zoom'])
+        current_zoom_pulse = float(status['ZoomPulse'])
 
         if abs(360 - current_pan) < 0.02 or current_pan < 0.02:
             # This if statement is necessary for when absolute pan is zero.
@@ -55,18 +288,25 @@ class SUNAPICamera:
             # This statement sets out to fix that bug by forcing the current pan position to be read as zero.
             current_pan = 0
 
+        self.__set_position(current_pan, current_tilt, current_zoom)
         return current_pan, current_tilt, current_zoom, current_zoom_pulse
 
-    def stop(self):
+    def stop(self, wait: bool = True):
         """
         Operation to stop ongoing pan, tilt and zoom movements of absolute relative and continuous type
 
+        Args:
+            wait: when False, returns a Future of the response instead of waiting for it.
+
         Returns:
-            Returns the response from the device to the command sent
+            Returns the response from the device to the command sent, or None when sent with move_interval
         """
+        self.__status = None
+        if self.__mover is not None:
+            self.__mover.submit(self.__cmd, 'ptzcontrol.cgi', _PTZ_STOP)
+            return None
 
-        response = self.__cmd(cgi='ptzcontrol.cgi',
-                              payload={'msubmenu': 'stop', 'action': 'control', 'OperationType': 'All'})
+        response = self.__cmd(cgi='ptzcontrol.cgi', payload=_PTZ_STOP, wait=wait)
 
         return response
 
@@ -84,9 +324,9 @@ class SUNAPICamera:
         """
 
         response = self.__cmd(cgi='ptzcontrol.cgi',
-                              payload={'msubmenu': 'absolute', 'action': 'control',
-                                       'Pan': pan, 'Tilt': tilt, 'Zoom': zoom,
-                                       'ZoomPulse': None, 'Channel': None})
+                              payload=_query(_PTZ_ABSOLUTE, Pan=pan, Tilt=tilt, Zoom=zoom))
+        if response.status_code in (200, 204):
+            self.__set_position(pan, tilt, zoom)
         return response
 
     def relative_move(self, pan: float, tilt: float, zoom: int):
@@ -102,7 +342,7 @@ class SUNAPICamera:
             Returns the response from the device to the command sent.
         """
 
-        current_pan, current_tilt, current_zoom = self.get_ptz_status()[:3]
+        current_pan, current_tilt, current_zoom = self.__get_position()
 
         if pan is not None:
 
@@ -146,20 +386,23 @@ class SUNAPICamera:
             elif (current_zoom + zoom) < 1:
                 zoom = 1 - current_zoom
 
-        if current_pan != 0:
-            response = self.__cmd(cgi='ptzcontrol.cgi',
-                                  payload={'msubmenu': 'relative', 'action': 'control',
-                                           'Pan': pan, 'Tilt': tilt, 'Zoom': zoom,
-                                           'ZoomPulse': None, 'Channel': None})
-
+        relative = self.__zero_pan_relative or current_pan != 0
+        response = self.__cmd(cgi='ptzcontrol.cgi',
+                              payload=_query(_PTZ_RELATIVE if relative else _PTZ_ABSOLUTE,
+                                             Pan=pan, Tilt=tilt, Zoom=zoom))
+
+        if response.status_code not in (200, 204):
+            self.__status = None
+        elif relative:
+            self.__set_position(current_pan if pan is None else (current_pan + pan) % 360,
+                                current_tilt if tilt is None else current_tilt + tilt,
+                                current_zoom if zoom is None else current_zoom + zoom)
         else:
-            response = self.__cmd(cgi='ptzcontrol.cgi',
-                                  payload={'msubmenu': 'absolute', 'action': 'control',
-                                           'Pan': pan, 'Tilt': tilt, 'Zoom': zoom,
-                                           'ZoomPulse': None, 'Channel': None})
+            self.__set_position(pan, tilt, zoom)
         return response
 
-    def continuous_move(self, normalized_speed: bool, pan: int, tilt: int, zoom: int, focus: str):
+    def continuous_move(self, normalized_speed: bool, pan: int, tilt: int, zoom: int, focus: str,
+                        wait: bool = True):
         """
         Operation for continuous Pan/Tilt and Zoom movements.
 
@@ -169,18 +412,22 @@ class SUNAPICamera:
             tilt: speed of movement of Tilt.
             zoom: speed of movement of Zoom.
             focus: focus control. This parameter cannot be sent together with pan, tilt, or zoom.
+            wait: when False, returns a Future of the response instead of waiting for it.
 
         Returns:
-            Returns the response from the device to the command sent.
+            Returns the response from the device to the command sent, or None when sent with move_interval.
         """
 
         if focus not in ("Near", "Far", "Stop", None):
             raise Exception("Unauthorized command: Please enter a string from the choices: 'Near', 'Far', or 'Stop'")
 
-        return self.__cmd(cgi='ptzcontrol.cgi',
-                          payload={'msubmenu': 'continuous', 'action': 'control',
-                                   'NormalizedSpeed': normalized_speed, 'Pan': pan,
-                                   'Tilt': tilt, 'Zoom': zoom, 'Focus': focus})
+        self.__status = None
+        payload = _query(_PTZ_CONTINUOUS, NormalizedSpeed=normalized_speed, Pan=pan, Tilt=tilt, Zoom=zoom, Focus=focus)
+        if self.__mover is not None:
+            self.__mover.submit(self.__cmd, 'ptzcontrol.cgi', payload)
+            return None
+
+        return self.__cmd(cgi='ptzcontrol.cgi', payload=payload, wait=wait)
 
     def area_zoom(self, x1: int, y1: int, x2: int, y2: int, tile_width: int, tile_height: int):
         """
@@ -198,10 +445,10 @@ class SUNAPICamera:
             Returns the response from the device to the command sent
         """
 
+        self.__status = None
         response = self.__cmd(cgi='ptzcontrol.cgi',
-                              payload={'msubmenu': 'areazoom', 'action': 'control',
-                                       'X1': x1, 'X2': x2, 'Y1': y1, 'Y2': y2, 'TileWidth': tile_width,
-                                       'TileHeight': tile_height})
+                              payload=_query(_PTZ_AREA_ZOOM, X1=x1, X2=x2, Y1=y1, Y2=y2,
+                                             TileWidth=tile_width, TileHeight=tile_height))
         return response
 
     def movement_control(self, direction: str, speed: float):
@@ -216,9 +463,9 @@ class SUNAPICamera:
             Returns the response from the device to the command sent
         """
 
+        self.__status = None
         return self.__cmd(cgi='ptzcontrol.cgi',
-                          payload={'msubmenu': 'move', 'action': 'control',
-                                   'Direction': direction, 'MoveSpeed': speed})
+                          payload=_query(_PTZ_MOVE, Direction=direction, MoveSpeed=speed))
 
     def go_to_home_position(self, channel: int):
         """
@@ -230,8 +477,8 @@ class SUNAPICamera:
         Returns:
             Returns the response from the device to the command sent
         """
-        return self.__cmd(cgi='ptzcontrol.cgi',
-                          payload={'msubmenu': 'home', 'action': 'control', 'Channel': channel})
+        self.__status = None
+        return self.__cmd(cgi='ptzcontrol.cgi', payload=_query(_PTZ_HOME, Channel=channel))
 
     def go_to_preset_position(self, preset, preset_name: str):
         """
@@ -245,9 +492,9 @@ class SUNAPICamera:
         Returns:
             Returns the response from the device to the command sent
         """
+        self.__status = None
         return self.__cmd(cgi='ptzcontrol.cgi',
-                          payload={'msubmenu': 'preset', 'action': 'control',
-                                   'Preset': preset, 'PresetName': preset_name})
+                          payload=_query(_PTZ_PRESET, Preset=preset, PresetName=preset_name))
 
     def zoom_out(self):
         """
@@ -257,8 +504,8 @@ class SUNAPICamera:
             Returns the response from the device to the command sent
         """
 
-        response = self.__cmd(cgi='ptzcontrol.cgi',
-                              payload={'msubmenu': 'areazoom', 'action': 'control', 'Type': '1x'})
+        self.__status = None
+        response = self.__cmd(cgi='ptzcontrol.cgi', payload=_PTZ_ZOOM_OUT)
         return response
 
     def aux_control(self, command: str):
@@ -272,8 +519,7 @@ class SUNAPICamera:
             Returns the response from the device to the command sent
            """
 
-        return self.__cmd(cgi='ptzcontrol.cgi',
-                          payload={'msubmenu': 'aux', 'action': 'control', 'Command': command})
+        return self.__cmd(cgi='ptzcontrol.cgi', payload=_query(_PTZ_AUX, Command=command))
 
     def attributes_information(self):
         """
@@ -283,7 +529,7 @@ class SUNAPICamera:
             Returns the response from the device to the command sent
         """
 
-        return self.__cmd(cgi='attributes.cgi', payload={})
+        return self.__cmd(cgi='attributes.cgi', payload='')
 
     def swing_control(self, channel: int, mode: str):
         """
@@ -301,9 +547,8 @@ class SUNAPICamera:
             raise Exception("Unauthorized command: "
                             "Please enter a string from the choices: 'Pan', 'Tilt', 'PanTilt', 'Stop'")
 
-        return self.__cmd(cgi='ptzcontrol.cgi',
-                          payload={'msubmenu': 'swing', 'action': 'control',
-                                   'Channel': channel, 'Mode': mode})
+        self.__status = None
+        return self.__cmd(cgi='ptzcontrol.cgi', payload=_query(_PTZ_SWING, Channel=channel, Mode=mode))
 
     def group_control(self, channel: int, group: int, mode: str):
         """
@@ -322,10 +567,9 @@ class SUNAPICamera:
             raise Exception("Unauthorized command: "
                             "Please enter a string from the choices: 'Start' or 'Stop'")
 
+        self.__status = None
         return self.__cmd(cgi='ptzcontrol.cgi',
-                          payload={'msubmenu': 'group', 'action': 'control',
-                                   'Channel': channel, 'Group': group,
-                                   'Mode': mode})
+                          payload=_query(_PTZ_GROUP, Channel=channel, Group=group, Mode=mode))
 
     def tour_control(self, channel: int, tour: int, mode: str):
         """
@@ -343,10 +587,9 @@ class SUNAPICamera:
         if mode not in ("Start", "Stop", None):
             raise Exception("Unauthorized command: Please enter a string from the choices: 'Start' or 'Stop'")
 
+        self.__status = None
         return self.__cmd(cgi='ptzcontrol.cgi',
-                          payload={'msubmenu': 'tour', 'action': 'control',
-                                   'Channel': channel, 'Tour': tour,
-                                   'Mode': mode})
+                          payload=_query(_PTZ_TOUR, Channel=channel, Tour=tour, Mode=mode))
 
     def trace_control(self, channel: int, trace: int, mode: str):
         """
@@ -364,10 +607,9 @@ class SUNAPICamera:
         if mode not in ("Start", "Stop", None):
             raise Exception("Unauthorized command: Please enter a string from the choices: 'Start' or 'Stop'")
 
+        self.__status = None
         return self.__cmd(cgi='ptzcontrol.cgi',
-                          payload={'msubmenu': 'trace', 'action': 'control',
-                                   'Channel': channel, 'Trace': trace,
-                                   'Mode': mode})
+                          payload=_query(_PTZ_TRACE, Channel=channel, Trace=trace, Mode=mode))
 
     def applications(self):
         """
@@ -376,7 +618,7 @@ class SUNAPICamera:
             Returns the response from the device to the command sent
         """
 
-        return self.__cmd(cgi='opensdk.cgi', payload={'msubmenu': 'apps', 'action': 'view'})
+        return self.__cmd(cgi='opensdk.cgi', payload=_APPS)
 
     def snap_shot(self):
         """
@@ -384,13 +626,41 @@ class SUNAPICamera:
         Returns:
              Returns PIL.Image or None
         """
+        if Image is None:
+            raise RuntimeError("Snapshots require Pillow: pip install Pillow")
 
-        response = self.__cmd(cgi='video.cgi',
-                              payload={'msubmenu': 'snapshot', 'action': 'view'})
+        response = self.__cmd(cgi='video.cgi', payload=_SNAPSHOT)
 
         if response.status_code == 200:
-            from io import BytesIO
-            from PIL import Image
+            decoder = _jpeg_decoder()
+            if decoder is not None:
+                return Image.fromarray(decoder.decode(response.content, pixel_format=TJPF_RGB))
             return Image.open(BytesIO(response.content))
         else:
             return None
+
+    def snap_shot_array(self, bgr: bool = False):
+        """
+        Sends snapshot command to the camera and decodes it straight into a numpy array, without going through PIL
+        Args:
+            bgr: returns the channels in OpenCV's BGR order instead of RGB
+
+        Returns:
+             Returns numpy.ndarray of shape (height, width, 3) or None
+        """
+        decoder = _jpeg_decoder()
+        opencv = _opencv()
+        if decoder is None and opencv is None:
+            raise RuntimeError("Snapshot arrays require PyTurboJPEG or OpenCV: pip install pyptz[jpeg]")
+
+        response = self.__cmd(cgi='video.cgi', payload=_SNAPSHOT)
+
+        if response.status_code != 200:
+            return None
+
+        if decoder is not None:
+            return decoder.decode(response.content, pixel_format=TJPF_BGR if bgr else TJPF_RGB)
+
+        cv2, numpy = opencv
+        image = cv2.imdecode(numpy.frombuffer(response.content, dtype=numpy.uint8), cv2.IMREAD_COLOR)
+        return image if bgr else cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
@@ -0,0 +1,90 @@
+import logging
+import socket
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """
+    HTTPAdapter sending small PTZ requests without Nagle's delay over kept-alive TCP connections
+    """
+
+    socket_options = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+                      (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
+class Debouncer:
+    """
+    Sends commands from a background thread, keeping only the latest one submitted while the previous was sent.
+    The thread is only started by the first command submitted.
+    """
+
+    def __init__(self, interval: float):
+        """
+        Args:
+            interval: minimum time in seconds between two commands sent.
+        """
+        self.__interval = interval
+        self.__pending = None
+        self.__closed = False
+        self.__lock = threading.Lock()
+        self.__event = threading.Event()
+        self.__thread = None
+
+    def submit(self, function, *args):
+        """
+        Schedules function(*args), replacing the command still waiting to be sent, if any.
+
+        Args:
+            function: function sending the command.
+            *args: arguments of the function.
+
+        Raises:
+            RuntimeError: the debouncer was closed, the command would never be sent.
+        """
+        with self.__lock:
+            if self.__closed:
+                raise RuntimeError('Cannot send a command after close()')
+            self.__pending = function, args
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, daemon=True)
+                self.__thread.start()
+            self.__event.set()
+
+    def close(self):
+        """
+        Sends the command still waiting, if any, and stops the background thread.
+        """
+        with self.__lock:
+            self.__closed = True
+            self.__event.set()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def __run(self):
+        while True:
+            if not self.__closed:
+                self.__event.wait()
+            with self.__lock:
+                pending, self.__pending = self.__pending, None
+                self.__event.clear()
+
+            if pending is None:
+                if self.__closed:
+                    return
+                continue
+
+            function, args = pending
+            try:
+                function(*args)
+            except Exception:
+                logger.exception('Debounced command failed')
+            time.sleep(self.__interval)
@@ -1,7 +1,51 @@
+"""
+Control of AXIS cameras through VAPIX.
+
+A rejected login (HTTP 401) raises VAPIXAuthError, a PermissionError subclass, where it used to call exit(1).
+"""
+import io
+import itertools
+import re
 import time
+from functools import lru_cache
+from urllib.parse import urlencode
 
-from bs4 import BeautifulSoup
-from requests import auth, get
+import requests
+import urllib3
+from requests import auth, exceptions
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from pyptz.utils import Debouncer, KeepAliveAdapter
+
+try:
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    # Only the tags AXIS puts its error message in are parsed
+    _ERROR_STRAINER = SoupStrainer(['title', 'body', 'pre'])
+except ImportError:
+    BeautifulSoup = None
+
+# one presetposno<N>=<name> line of the presetposall query
+_PRESET_RE = re.compile(r'presetposno(\d+)=(.*)')
+# numeric key=value pairs of the position and speed queries
+_KV_RE = re.compile(r'(\w+)=([-0-9.eE+]+)')
+
+
+@lru_cache(maxsize=None)
+def _default_session():
+    """
+    Returns the session shared by the VAPIXCamera created without one, pooling connections for up to 10 cameras
+    """
+    session = requests.Session()
+    session.mount('http://', KeepAliveAdapter(pool_connections=10, pool_maxsize=10, pool_block=True))
+    return session
+
+
+class VAPIXAuthError(PermissionError):
+    """
+    Raised when the AXIS camera rejects the credentials
+    """
 
 
 class VAPIXCamera:
@@ -9,50 +53,164 @@ class VAPIXCamera:
     Module for controlling AXIS cameras using VAPIX
     """
 
-    def __init__(self, ip, user, password):
+    __slots__ = ('__username', '__password', '__origin', '__path', '__url', '__base', '__timeout',
+                 '__preset_ttl', '__preset_cache', '__timestamp', '__session', '__auth', '__mover',
+                 '__pool', '__pool_timeout')
+
+    def __init__(self, ip, user, password, warm_up=False, timeout=(2.0, 5.0), preset_ttl=60, session=None):
+        """
+        Args:
+            ip: address of the camera, optionally with its port.
+            user: user name.
+            password: password.
+            warm_up: takes the digest challenge at construction, so the first PTZ command needs one round-trip.
+            timeout: (connect, read) timeout in seconds of every command.
+            preset_ttl: seconds the preset lists are cached for.
+            session: requests.Session to send the commands with, by default one shared by every camera.
+                absolute_move, continuous_move, stop_move and configure_and_move, and the *_async moves built
+                on them, bypass it once the digest challenge is taken: they go through the camera's own urllib3
+                pool, so the session's proxies, headers, adapters and pool limits do not apply to them, and they
+                always use the timeout given here.
+        """
         self.__username = user
         self.__password = password
-        self.__url = 'http://' + ip + '/axis-cgi/com/ptz.cgi'
+        self.__origin = 'http://' + ip
+        self.__path = '/axis-cgi/com/ptz.cgi'
+        self.__url = self.__origin + self.__path
+        self.__base = {'camera': 1, 'html': 'no'}
+        self.__timeout = timeout
 
-    @staticmethod
-    def __merge(*args) -> dict:
+        # preset query -> (monotonic time, result), preset lists rarely change
+        self.__preset_ttl = preset_ttl
+        self.__preset_cache = {}
+
+        # cache-busting 'timestamp' param: unique per request and seeded from the clock,
+        # without reading the clock on every command
+        self.__timestamp = itertools.count(int(time.time()))
+
+        # Cameras share one kept-alive session unless given their own. Credentials differ between cameras,
+        # so the digest auth, which also caches the nonce, is per camera and passed with each request
+        self.__session = session if session is not None else _default_session()
+        self.__auth = auth.HTTPDigestAuth(user, password)
+
+        # one background sender for the *_async moves, keeping them in order and only the latest one pending.
+        # Its thread is started by the first of them, synchronous users never get one.
+        self.__mover = Debouncer(0)
+
+        # The PTZ moves sent in teleop loops go straight to a urllib3 pool bound to the camera host,
+        # signed with the digest challenge requests obtained, see __fast_cmd
+        self.__pool = urllib3.connection_from_url(self.__origin, maxsize=4, block=True,
+                                                  socket_options=KeepAliveAdapter.socket_options)
+        if isinstance(timeout, tuple):
+            self.__pool_timeout = urllib3.Timeout(connect=timeout[0], read=timeout[1])
+        else:
+            self.__pool_timeout = urllib3.Timeout(timeout)
+
+        if warm_up:
+            # a cheap query takes the digest challenge now, so the first PTZ command is sent in one round-trip
+            self.__cmd({'query': 'speed'})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Closes the connections kept open to the camera. The session, shared or given by the caller, is left open.
         """
-        Given any number of dicts, shallow copy and merge into a new dict,
-        precedence goes to key value pairs in latter dicts
+        self.__mover.close()
+        self.__pool.close()
 
+    @staticmethod
+    def __check(response):
+        """
+        Prints the error returned by the camera, if any.
         Args:
-            *args: argument dictionary
+            response: response from the device
 
-        Returns:
-            Return a merged dictionary
+        Raises:
+            VAPIXAuthError: the camera rejected the credentials.
         """
-        results = {}
-        for dictionary in args:
-            results.update(dictionary)
-        return results
+        if response.status_code not in (200, 204):
+            if BeautifulSoup is not None and response.headers.get('Content-Type', '').startswith('text/html'):
+                print(BeautifulSoup(response.text, 'html.parser', parse_only=_ERROR_STRAINER).get_text())
+            else:
+                print(response.text)
+            if response.status_code == 401:
+                raise VAPIXAuthError(response.text)
 
-    def __cmd(self, payload: dict):
+    def __cmd(self, payload: dict, timeout=None, stream: bool = False):
         """
         Function used to send commands to the camera
         Args:
             payload: argument dictionary for camera control
+            timeout: (connect, read) timeout in seconds, defaults to the one given at construction
+            stream: leaves the body unread, for the caller to iterate and close the response
 
         Returns:
             Returns the response from the device to the command sent
         """
 
-        args = {'camera': 1, 'html': 'no', 'timestamp': int(time.time())}
+        params = {**payload, **self.__base, 'timestamp': next(self.__timestamp)}
+        response = self.__session.get(self.__url, params=params, auth=self.__auth, stream=stream,
+                                      timeout=self.__timeout if timeout is None else timeout)
 
-        response = get(self.__url,
-                       auth=auth.HTTPDigestAuth(self.__username, self.__password),
-                       params=VAPIXCamera.__merge(payload, args))
+        self.__check(response)
+        return response
 
-        if (response.status_code != 200) and (response.status_code != 204):
-            soup = BeautifulSoup(response.text, features="lxml")
-            print('%s', soup.get_text())
-            if response.status_code == 401:
-                exit(1)
+    def __fast_cmd(self, payload: dict):
+        """
+        Sends a command through urllib3 directly, without building a requests.PreparedRequest, once requests
+        has obtained the digest challenge. Falls back to __cmd to get the challenge and whenever it is stale.
+        The pool is the camera's own, so it holds up to 4 kept-alive connections besides the session's.
+        Args:
+            payload: argument dictionary for camera control
+
+        Returns:
+            Returns the response from the device to the command sent
 
+        Raises:
+            requests.exceptions.ConnectTimeout, requests.exceptions.ReadTimeout, requests.exceptions.ConnectionError:
+                the errors raised by urllib3, mapped as requests does, so both paths raise the same exceptions.
+        """
+        params = {**payload, **self.__base, 'timestamp': next(self.__timestamp)}
+        uri = self.__path + '?' + urlencode([(key, value) for key, value in params.items() if value is not None])
+
+        self.__auth.init_per_thread_state()
+        try:
+            authorization = self.__auth.build_digest_header('GET', uri)
+        except KeyError:
+            # no challenge received yet by this thread
+            authorization = None
+        if authorization is None:
+            return self.__cmd(payload)
+
+        try:
+            raw = self.__pool.request('GET', uri, headers={'Authorization': authorization},
+                                      timeout=self.__pool_timeout, retries=False)
+        except urllib3.exceptions.NewConnectionError as error:
+            # NewConnectionError subclasses ConnectTimeoutError, a refused connection is not a timeout
+            raise exceptions.ConnectionError(error) from error
+        except urllib3.exceptions.ConnectTimeoutError as error:
+            raise exceptions.ConnectTimeout(error) from error
+        except urllib3.exceptions.ReadTimeoutError as error:
+            raise exceptions.ReadTimeout(error) from error
+        except urllib3.exceptions.HTTPError as error:
+            raise exceptions.ConnectionError(error) from error
+        if raw.status == 401:
+            # the nonce expired, requests answers the new challenge and the next command is signed with it
+            return self.__cmd(payload)
+
+        response = requests.Response()
+        response.status_code = raw.status
+        response.reason = raw.reason
+        response.headers = CaseInsensitiveDict(raw.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(raw.data)
+        response.url = self.__origin + uri
+        self.__check(response)
         return response
 
     def absolute_move(self, pan: float, tilt: float, zoom: int, speed: int):
@@ -68,7 +226,7 @@ class VAPIXCamera:
         Returns:
             Returns the response from the device to the command sent.
         """
-        return self.__cmd({'pan': pan, 'tilt': tilt, 'zoom': zoom, 'speed': speed})
+        return self.__fast_cmd({'pan': pan, 'tilt': tilt, 'zoom': zoom, 'speed': speed})
 
     def continuous_move(self, pan: int, tilt: int, zoom: int):
         """
@@ -83,8 +241,20 @@ class VAPIXCamera:
             Returns the response from the device to the command sent.
 
         """
-        pan_tilt = str(pan) + "," + str(tilt)
-        return self.__cmd({'continuouspantiltmove': pan_tilt, 'continuouszoommove': zoom})
+        pan_tilt = f"{pan},{tilt}"
+        return self.__fast_cmd({'continuouspantiltmove': pan_tilt, 'continuouszoommove': zoom})
+
+    def continuous_move_async(self, pan: int, tilt: int, zoom: int):
+        """
+        Non-blocking continuous_move: the command is sent from a background thread and replaces any
+        continuous_move_async or stop_move_async still waiting to be sent.
+
+        Args:
+            pan: speed of movement of Pan.
+            tilt: speed of movement of Tilt.
+            zoom: speed of movement of Zoom.
+        """
+        self.__mover.submit(self.continuous_move, pan, tilt, zoom)
 
     def relative_move(self, pan: float, tilt: float, zoom: int, speed: int):
         """
@@ -109,7 +279,14 @@ class VAPIXCamera:
         Returns:
             Returns the response from the device to the command sent
         """
-        return self.__cmd({'continuouspantiltmove': '0,0', 'continuouszoommove': 0})
+        return self.__fast_cmd({'continuouspantiltmove': '0,0', 'continuouszoommove': 0})
+
+    def stop_move_async(self):
+        """
+        Non-blocking stop_move: the command is sent from a background thread and replaces any
+        continuous_move_async still waiting to be sent.
+        """
+        self.__mover.submit(self.stop_move)
 
     def center_move(self, pos_x: int, pos_y: int, speed: int):
         """
@@ -125,7 +302,7 @@ class VAPIXCamera:
         Returns:
             Returns the response from the device to the command sent
         """
-        pan_tilt = str(pos_x) + "," + str(pos_y)
+        pan_tilt = f"{pos_x},{pos_y}"
         return self.__cmd({'center': pan_tilt, 'speed': speed})
 
     def area_zoom(self, pos_x: int, pos_y: int, zoom: int, speed: int):
@@ -141,7 +318,7 @@ class VAPIXCamera:
         Returns:
             Returns the response from the device to the command sent
         """
-        x_y_zoom = str(pos_x) + "," + str(pos_y) + "," + str(zoom)
+        x_y_zoom = f"{pos_x},{pos_y},{zoom}"
         return self.__cmd({'areazoom': x_y_zoom, 'speed': speed})
 
     def move(self, position: str, speed: float):
@@ -155,7 +332,29 @@ class VAPIXCamera:
         Returns:
             Returns the response from the device to the command sent
         """
-        return self.__cmd({'move': str(position), 'speed': speed})
+        return self.__cmd({'move': position, 'speed': speed})
+
+    def configure_and_move(self, pan: float = None, tilt: float = None, zoom: int = None, speed: int = None,
+                           rpan: float = None, rtilt: float = None, rzoom: int = None):
+        """
+        Sends the speed and an absolute and/or relative move in a single request. Parameters left to None
+        are not sent.
+
+        Args:
+            pan: pans the device relative to the (0,0) position.
+            tilt: tilts the device relative to the (0,0) position.
+            zoom: zooms the device n steps.
+            speed: speed move camera.
+            rpan: pans the device n degrees relative to the current position.
+            rtilt: tilts the device n degrees relative to the current position.
+            rzoom: zooms the device n steps relative to the current position.
+
+        Returns:
+            Returns the response from the device to the command sent.
+        """
+        payload = {'pan': pan, 'tilt': tilt, 'zoom': zoom, 'speed': speed,
+                   'rpan': rpan, 'rtilt': rtilt, 'rzoom': rzoom}
+        return self.__fast_cmd({key: value for key, value in payload.items() if value is not None})
 
     def go_home_position(self, speed: int):
         """
@@ -177,11 +376,9 @@ class VAPIXCamera:
             Returns a tuple with the position of the camera (P, T, Z)
         """
         response = self.__cmd({'query': 'position'})
-        pan = float(response.text.split()[0].split('=')[1])
-        tilt = float(response.text.split()[1].split('=')[1])
-        zoom = float(response.text.split()[2].split('=')[1])
+        values = dict(_KV_RE.findall(response.text))
 
-        return pan, tilt, zoom
+        return float(values['pan']), float(values['tilt']), float(values['zoom'])
 
     def go_to_server_preset_name(self, name: str, speed: int):
         """
@@ -232,7 +429,12 @@ class VAPIXCamera:
             Returns the list of presets positions stored on the device.
 
         """
-        return self.__cmd({'query': 'presetposcam'})
+        response = self.__get_cached('presetposcam')
+        if response is None:
+            response = self.__cmd({'query': 'presetposcam'})
+            if response.status_code == 200:
+                self.__set_cached('presetposcam', response)
+        return response
 
     def list_all_preset(self):
         """
@@ -242,20 +444,57 @@ class VAPIXCamera:
             Returns the list of all presets positions.
 
         """
-        response = self.__cmd({'query': 'presetposall'})
-        soup = BeautifulSoup(response.text, features="lxml")
-        resp_presets = soup.text.split('\n')
-        presets = []
+        presets = self.__get_cached('presetposall')
+        if presets is not None:
+            return list(presets)
 
-        for i in range(1, len(resp_presets) - 1):
-            preset = resp_presets[i].split("=")
-            presets.append((int(preset[0].split('presetposno')[1]), preset[1].rstrip('\r')))
+        # the body is matched line by line as it arrives instead of being joined into one string first
+        response = self.__cmd({'query': 'presetposall'}, stream=True)
+        try:
+            if response.encoding is None:
+                response.encoding = 'utf-8'
+            matches = map(_PRESET_RE.match, response.iter_lines(decode_unicode=True))
+            presets = [(int(match.group(1)), match.group(2)) for match in matches if match]
+        finally:
+            response.close()
 
+        if response.status_code == 200:
+            self.__set_cached('presetposall', tuple(presets))
         return presets
 
+    def invalidate_preset_cache(self):
+        """
+        Forgets the preset lists cached by list_preset_device and list_all_preset, e.g. after a preset was changed.
+        """
+        self.__preset_cache.clear()
+
+    def __get_cached(self, query: str):
+        """
+        Looks up a preset list cached less than preset_ttl seconds ago.
+        Args:
+            query: preset query the list was returned for.
+
+        Returns:
+            Returns the cached list or None when it is missing or expired.
+        """
+        entry = self.__preset_cache.get(query)
+        if entry is None or time.monotonic() - entry[0] >= self.__preset_ttl:
+            return None
+        return entry[1]
+
+    def __set_cached(self, query: str, value):
+        """
+        Caches a preset list for preset_ttl seconds.
+        Args:
+            query: preset query the list was returned for.
+            value: preset list returned by the camera.
+        """
+        self.__preset_cache[query] = time.monotonic(), value
+
     def set_speed(self, speed: int = None):
         """
         Sets the head speed of the device that is connected to the specified camera.
+        To change the speed of a move, prefer configure_and_move, which sends both in one request.
         Args:
             speed: speed value.
 
@@ -274,7 +513,7 @@ class VAPIXCamera:
 
         """
         resp = self.__cmd({'query': 'speed'})
-        return int(resp.text.split()[0].split('=')[1])
+        return int(dict(_KV_RE.findall(resp.text))['speed'])
 
     def info_ptz_command(self):
         """
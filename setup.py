@@ -1,19 +1,18 @@
-import os
 import re
+from pathlib import Path
 
 import setuptools
 
+_HERE = Path(__file__).resolve().parent
+_VERSION_RE = re.compile(r"^__version__\s*=\s*['\"](.*)['\"]\s*$", re.MULTILINE)
+
 
 def read(filename):
-    path = os.path.join(os.path.abspath(os.path.dirname(__file__)), filename)
-    with open(path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    return content
+    return _HERE.joinpath(filename).read_text(encoding='utf-8')
 
 
 def get_version(text):
-    match = re.search(r"^__version__\s*=\s*['\"](.*)['\"]\s*$", text, re.MULTILINE)
-    return match.group(1)
+    return _VERSION_RE.search(text).group(1)
 
 
 setuptools.setup(name='pyptz',
@@ -30,7 +29,9 @@ setuptools.setup(name='pyptz',
                               "Operating System :: OS Independent", ],
                  keywords=['ONVIF', 'VAPIX', 'SUNAPI'],
                  python_requires='>=3.6',
-                 install_requires=['urllib3==1.26.18',
-                                   'requests==2.31.0',
-                                   'onvif-zeep==0.2.12',
-                                   'beautifulsoup4==4.12.3'])
+                 install_requires=['urllib3>=1.26,<3',
+                                   'requests>=2.31,<3',
+                                   'onvif-zeep==0.2.12'],
+                 extras_require={'async': ['httpx[http2]'],
+                                 'html': ['beautifulsoup4>=4.12'],
+                                 'jpeg': ['PyTurboJPEG']})